@@ -1,306 +1,518 @@
 import streamlit as st
 import os
 import subprocess
+import shutil
 import sqlite3
 from pathlib import Path
-import re
-from datetime import datetime
+import json
+import struct
 import tempfile
 import time
-import base64
-import re
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # --- Configuration (unchanged) ---
 DATA_DIR        = Path("data")
 RECORDINGS_DIR  = DATA_DIR / "recordings"
 SEGMENTS_DIR    = DATA_DIR / "segments"
 DB_PATH         = DATA_DIR / "metadata.db"
-
+STATIC_DIR      = Path(__file__).parent / "static"
+BROWSE_PAGE_SIZE = 20  # cards per browse page
+PLAYER_HEIGHT   = 500   # player iframe (and the tile strip beside it), enhanced player
+SIMPLE_PLAYER_HEIGHT = 400  # same, for the plain player with only speed buttons
+MEDIA_CACHE_ENTRIES = 8  # clips (and their posters) kept in memory for the players
+MEDIA_CACHE_FILE_MAX = 25 << 20  # bigger files aren't kept, so the cache stays under ~200 MB
+
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",      # readers don't block the writer
+    "synchronous=NORMAL",    # fsync at checkpoints only; safe with WAL
+    "temp_store=MEMORY",
+    "mmap_size=268435456",   # read pages through a 256 MB mapping instead of read()
+    "cache_size=-20000",     # ~20 MB page cache
+    "busy_timeout=5000",     # wait out detect.py writes instead of failing
+)
+
+# --- SQL (kept constant so sqlite3's statement cache reuses the prepared plans) ---
+INSERT_BUCKET_SQL  = "INSERT OR IGNORE INTO buckets(name) VALUES(?)"
+UPSERT_REC_SQL     = ("INSERT INTO recordings(filename) VALUES(?) "
+                      "ON CONFLICT(filename) DO UPDATE SET filename=excluded.filename RETURNING id")
+INSERT_SEG_SQL     = ("INSERT INTO segments(recording_id,filename,start_sec,end_sec,bucket,notes,duration,fps) "
+                      "VALUES(?,?,?,?,?,?,?,?)")
+SET_SEG_INFO_SQL   = "UPDATE segments SET duration=?, fps=? WHERE id=?"
+SET_SEG_FPS_SQL    = "UPDATE segments SET fps=? WHERE id=?"
+UPDATE_SEG_SQL     = "UPDATE segments SET bucket=?, notes=? WHERE id=?"
+DELETE_SEG_SQL     = "DELETE FROM segments WHERE id=?"
+GET_VIDEO_INFO_SQL = "SELECT duration, fps FROM video_info WHERE path=? AND mtime_ns=? AND size=?"
+PUT_VIDEO_INFO_SQL = "INSERT OR REPLACE INTO video_info(path,mtime_ns,size,duration,fps) VALUES(?,?,?,?,?)"
+# the bucket list is bound as one JSON array, so the SQL text never varies with the selection
+BROWSE_SEG_BASE    = ("SELECT s.id, r.filename, s.filename, s.bucket, s.notes, s.duration, s.fps "
+                      "FROM segments s JOIN recordings r ON s.recording_id=r.id "
+                      "WHERE s.bucket IN (SELECT value FROM json_each(?))")
+BROWSE_PAGE_SQL    = " ORDER BY s.id DESC LIMIT ? OFFSET ?"  # newest first, one page at a time
+BROWSE_SEG_SQL     = BROWSE_SEG_BASE + BROWSE_PAGE_SQL
+BROWSE_SEG_BY_DATE_SQL = BROWSE_SEG_BASE + " AND date(r.imported_at)=?" + BROWSE_PAGE_SQL
+
+@st.cache_resource
+def get_conn():
+    # one long-lived connection shared across reruns; transactions are explicit
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(f"PRAGMA {pragma}")
+    return conn
+
+@st.cache_resource
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS recordings (
-            id          INTEGER PRIMARY KEY,
-            filename    TEXT UNIQUE,
-            imported_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )""")
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS segments (
-            id            INTEGER PRIMARY KEY,
-            recording_id  INTEGER REFERENCES recordings(id),
-            filename      TEXT UNIQUE,
-            start_sec     REAL,
-            end_sec       REAL,
-            bucket        INTEGER,
-            notes         TEXT,
-            created_at    DATETIME DEFAULT CURRENT_TIMESTAMP
-        )""")
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS buckets (
-            id   INTEGER PRIMARY KEY,
-            name TEXT UNIQUE
-        )
-    """)
-    for b in ("driver","hybrid","iron","wedge"):
-        c.execute("INSERT OR IGNORE INTO buckets(name) VALUES(?)", (b,))
-    conn.commit()
-    conn.close()
+    """Create/migrate the schema and seed buckets; once per process, in one transaction."""
+    conn = get_conn()
+    with db_lock(), conn:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS recordings (
+                id          INTEGER PRIMARY KEY,
+                filename    TEXT UNIQUE,
+                imported_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )""")
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS segments (
+                id            INTEGER PRIMARY KEY,
+                recording_id  INTEGER REFERENCES recordings(id),
+                filename      TEXT UNIQUE,
+                start_sec     REAL,
+                end_sec       REAL,
+                bucket        INTEGER,
+                notes         TEXT,
+                created_at    DATETIME DEFAULT CURRENT_TIMESTAMP,
+                duration      REAL,
+                fps           REAL
+            )""")
+        # databases created before duration/fps were stored on the row
+        seg_cols = {row[1] for row in c.execute("PRAGMA table_info(segments)")}
+        for col in ("duration", "fps"):
+            if col not in seg_cols:
+                c.execute(f"ALTER TABLE segments ADD COLUMN {col} REAL")
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                id   INTEGER PRIMARY KEY,
+                name TEXT UNIQUE
+            )
+        """)
+        # ffprobe results, keyed like probe_video so they survive app restarts
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS video_info (
+                path      TEXT PRIMARY KEY,
+                mtime_ns  INTEGER,
+                size      INTEGER,
+                duration  REAL,
+                fps       REAL
+            )""")
+        # browse_page filters segments by recording + bucket and recordings by import date
+        c.execute("CREATE INDEX IF NOT EXISTS idx_seg_rec_bucket ON segments(recording_id, bucket)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_seg_bucket ON segments(bucket)")
+        # date lookups also carry filename, so the by-date browse never visits the recordings table
+        c.execute("DROP INDEX IF EXISTS idx_rec_date")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_rec_date_file ON recordings(date(imported_at), filename)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_rec_imported ON recordings(imported_at)")
+        c.executemany(INSERT_BUCKET_SQL, [(b,) for b in ("driver","hybrid","iron","wedge")])
+        # give the planner statistics for the indexes once; the shape of the data rarely changes
+        if not c.execute("SELECT 1 FROM sqlite_master WHERE name='sqlite_stat1'").fetchone():
+            c.execute("ANALYZE")
+
+@st.cache_data(max_entries=4, show_spinner=False)  # old mtimes are never asked for again
+def scan_recordings(dir_mtime_ns: int):
+    # dir_mtime_ns is only the cache key: it changes whenever a file is added/removed
+    # one readdir; DirEntry answers is_file() from it without a stat per entry
+    with os.scandir(RECORDINGS_DIR) as it:
+        return sorted(Path(e.path) for e in it if e.name.endswith(".mp4") and e.is_file())
 
 def list_recordings():
-    return sorted(RECORDINGS_DIR.glob("*.mp4"))
+    return scan_recordings(RECORDINGS_DIR.stat().st_mtime_ns)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def query_import_dates(count: int, latest):
+    # (count, latest) is only the cache key; it moves whenever a recording is added
+    # DISTINCT date() is answered from idx_rec_date_file without touching the table rows
+    rows = get_conn().execute(
+        "SELECT DISTINCT date(imported_at) AS d FROM recordings ORDER BY d DESC"
+    ).fetchall()
+    return [r[0] for r in rows]
+
+def list_import_dates():
+    count, latest = get_conn().execute("SELECT COUNT(*), MAX(imported_at) FROM recordings").fetchone()
+    return query_import_dates(count, latest)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def query_buckets(data_version: int):
+    # data_version is only the cache key: it moves when another process (detect.py) commits;
+    # this app's own bucket inserts clear the cache instead
+    return [r[0] for r in get_conn().execute("SELECT name FROM buckets ORDER BY name")]
 
 def list_buckets():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT name FROM buckets ORDER BY name")
-    names = [r[0] for r in c.fetchall()]
-    conn.close()
-    return names
+    return query_buckets(get_conn().execute("PRAGMA data_version").fetchone()[0])
+
+@st.cache_data(max_entries=64, show_spinner=False)  # a few filter/page combinations per data_version
+def query_segments(query: str, params: tuple, data_version: int):
+    # keyed like query_buckets; this app's own segment writes call query_segments.clear()
+    return get_conn().execute(query, params).fetchall()
+
+TIMESTAMP_FACTORS = (1, 60, 3600)  # SS, MM, HH read right to left
 
 def parse_timestamp(ts: str) -> float:
     parts = ts.strip().split(":")
-    if not parts or len(parts) > 3:
+    if len(parts) > 3:
         raise ValueError("Invalid timestamp format")
-    # pad to [HH, MM, SS]
-    parts = [float(p) for p in parts]
-    if len(parts) == 1:
-        hours, mins, secs = 0, 0, parts[0]
-    elif len(parts) == 2:
-        hours, mins, secs = 0, parts[0], parts[1]
-    else:
-        hours, mins, secs = parts
-    return hours * 3600 + mins * 60 + secs
+    # SS, MM:SS and HH:MM:SS all line up from the right
+    return sum(float(p) * f for p, f in zip(reversed(parts), TIMESTAMP_FACTORS))
 
 def format_timestamp(seconds: float) -> str:
     """Format a float seconds into HH:MM:SS (zero-padded)."""
-    h = int(seconds // 3600)
-    m = int((seconds % 3600) // 60)
-    s = seconds % 60
+    m, s = divmod(seconds, 60)
+    h, m = divmod(int(m), 60)
     return f"{h:02d}:{m:02d}:{s:05.2f}"  # SS.ss with two decimals
 
-def get_video_info(path: Path):
-    # Retrieve duration and frame rate via ffprobe
-    cmd = [
-        'ffprobe', '-v', 'error',
-        '-select_streams', 'v:0',
-        '-show_entries', 'format=duration',
-        '-of', 'csv=p=0', str(path)
-    ]
-    duration = float(subprocess.run(cmd, capture_output=True, text=True).stdout.strip())
+def iter_boxes(f, start: int, end: int):
+    """Yield (type, payload_start, box_end) for the MP4 boxes in f[start:end]."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:  # 64-bit size follows the type
+            size, header = struct.unpack(">Q", f.read(8))[0], 16
+        elif size == 0:  # box runs to the end of its parent
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, pos + size
+        pos += size
+
+def find_box(f, start: int, end: int, kind: bytes):
+    for k, payload, box_end in iter_boxes(f, start, end):
+        if k == kind:
+            return payload, box_end
+    return None
+
+def read_timescale_duration(f, payload: int):
+    # mvhd/mdhd: version 1 widens the times and duration to 64 bits
+    f.seek(payload)
+    version = f.read(1)[0]
+    if version == 1:
+        f.seek(payload + 20)
+        timescale, duration = struct.unpack(">IQ", f.read(12))
+    else:
+        f.seek(payload + 12)
+        timescale, duration = struct.unpack(">II", f.read(8))
+    return timescale, duration
+
+def mp4_info(path_str: str):
+    """(duration, fps) read straight from the MP4 headers, or None if they can't be."""
+    try:
+        with open(path_str, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            moov = find_box(f, 0, size, b"moov")
+            if not moov:
+                return None
+            mvhd = find_box(f, *moov, b"mvhd")
+            if not mvhd:
+                return None
+            timescale, duration = read_timescale_duration(f, mvhd[0])
+            # fragmented files leave this 0 (or all ones, "unknown") and keep the real length
+            # in the fragments; only ffprobe can answer for those
+            if duration in (0, 0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF):
+                return None
+            for kind, payload, box_end in iter_boxes(f, *moov):
+                if kind != b"trak":
+                    continue
+                mdia = find_box(f, payload, box_end, b"mdia")
+                hdlr = mdia and find_box(f, *mdia, b"hdlr")
+                if not hdlr:
+                    continue
+                f.seek(hdlr[0] + 8)
+                if f.read(4) != b"vide":
+                    continue
+                mdhd = find_box(f, *mdia, b"mdhd")
+                minf = find_box(f, *mdia, b"minf")
+                stbl = minf and find_box(f, *minf, b"stbl")
+                stts = stbl and find_box(f, *stbl, b"stts")
+                if not (mdhd and stts):
+                    return None
+                track_scale, _ = read_timescale_duration(f, mdhd[0])
+                f.seek(stts[0] + 4)
+                (count,) = struct.unpack(">I", f.read(4))
+                entries = struct.iter_unpack(">II", f.read(8 * count))
+                # like ffprobe's r_frame_rate: the rate of the most common frame spacing
+                _, delta = max(entries, default=(0, 0))
+                if not (timescale and track_scale and delta):
+                    return None
+                return duration / timescale, track_scale / delta
+    except (OSError, struct.error, IndexError):
+        pass
+    return None  # no video track, or headers that couldn't be read
+
+def ffprobe_info(path_str: str):
+    # Retrieve duration and frame rate with a single ffprobe call
     cmd = [
         'ffprobe', '-v', 'error',
         '-select_streams', 'v:0',
-        '-show_entries', 'stream=r_frame_rate',
-        '-of', 'csv=p=0', str(path)
+        '-show_entries', 'format=duration:stream=r_frame_rate',
+        '-of', 'json', path_str
     ]
-    rate = subprocess.run(cmd, capture_output=True, text=True).stdout.strip()
-    nums = re.split(r"[/\\]", rate)
-    fps = float(nums[0]) / float(nums[1]) if len(nums) == 2 else float(nums[0])
+    info = json.loads(subprocess.run(cmd, capture_output=True, text=True).stdout)
+    duration = float(info["format"]["duration"])
+    rate = info["streams"][0]["r_frame_rate"]
+    num, _, den = rate.partition("/")  # ffprobe writes e.g. "30000/1001"
+    fps = float(num) / float(den) if den else float(num)
     return duration, fps
 
-def video_to_base64(video_path: Path):
-    with open(video_path, "rb") as f:
-        data = f.read()
-    return "data:video/mp4;base64," + base64.b64encode(data).decode()
+def read_video_info(path_str: str):
+    # the MP4 headers answer without a subprocess; ffprobe covers anything they don't
+    return mp4_info(path_str) or ffprobe_info(path_str)
 
-def create_enhanced_video_player(video_path: Path, video_id: str):
-    """Create an enhanced video player with frame-by-frame and speed controls"""
-    video_src = video_to_base64(video_path)
-    
-    frame_duration = 1.0 / 30  # Duration of one frame in seconds
-    
-    html = f"""
-    <script>
-        (function() {{
-            window._prevInterval_{video_id} = null;
-            window._nextInterval_{video_id} = null;
-        }})
-    </script>
-    <div style="background: #000; padding: 8px; border-radius: 8px; margin-bottom: 16px;">
-        <!-- Speed Controls -->
+@st.cache_data(show_spinner=False)
+def probe_video(path_str: str, mtime_ns: int, size: int):
+    # mtime/size key both caches: st.cache_data for this process, video_info across restarts
+    row = get_conn().execute(GET_VIDEO_INFO_SQL, (path_str, mtime_ns, size)).fetchone()
+    if row:
+        return row
+    info = read_video_info(path_str)
+    db_write(PUT_VIDEO_INFO_SQL, (path_str, mtime_ns, size, *info))
+    return info
+
+def get_video_info(path: Path):
+    stat = path.stat()
+    return probe_video(str(path), stat.st_mtime_ns, stat.st_size)
+
+def map_concurrently(fn, items):
+    """list(map(fn, items)) on a short-lived thread pool, for subprocess-bound work."""
+    if not items:
+        return []
+    ctx = get_script_run_ctx()  # lets the workers use st.cache_data caches
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1),
+                            initializer=add_script_run_ctx, initargs=(None, ctx)) as ex:
+        return list(ex.map(fn, items))
+
+def get_video_infos(paths):
+    """get_video_info for many files, probing cache misses in parallel (None if unreadable)."""
+    def probe(path):
+        try:
+            return get_video_info(path)
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+    return map_concurrently(probe, paths)
+
+def cut_segment(src: Path, out_path: Path, start: float, end: float, accurate: bool = False,
+                on_progress=None):
+    """Write [start, end) of src to out_path; accurate=True re-encodes to cut on the exact frame."""
+    # stream copy is near-instant but starts on the keyframe at or before start
+    if accurate:
+        codec = ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "23",
+                 "-c:a", "aac", "-b:a", "128k"]
+    else:
+        codec = ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats", "-y",
+        "-ss", f"{start:.3f}",    # seek before input: jump to the keyframe, decode from there
+        "-i", str(src),
+        "-t",  f"{end-start:.3f}", # duration of segment
+        *codec,
+        "-movflags", "+faststart", # moov up front so playback starts before download ends
+        "-progress", "pipe:1",     # key=value lines on stdout while it runs
+        str(out_path)
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in proc.stdout:
+        key, _, value = line.strip().partition("=")
+        # out_time_us is how far into the clip ffmpeg has written ("N/A" before the first frame)
+        if on_progress and key == "out_time_us" and value.isdigit():
+            on_progress(min(1.0, int(value) / 1e6 / (end - start)))
+    if proc.wait():
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+@st.cache_resource
+def ffmpeg_pool():
+    # shared by all sessions so concurrent ffmpeg jobs stay bounded
+    return ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2))
+
+@st.cache_resource
+def db_lock():
+    # serializes transactions on the shared connection across threads
+    return threading.Lock()
+
+def db_write(sql: str, params=()):
+    """Run one write as its own transaction on the shared connection."""
+    conn = get_conn()
+    with db_lock(), conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(sql, params)
+
+@st.cache_data(max_entries=256, show_spinner=False)  # every folder a page spans, per mtime
+def scan_dir(dir_str: str, dir_mtime_ns: int) -> frozenset:
+    # dir_mtime_ns is only the cache key, as in scan_recordings
+    return frozenset(os.listdir(dir_str))
+
+def dir_entries(d: Path) -> frozenset:
+    """Names in d, re-listed only when d changes (one stat per folder, not per file)."""
+    try:
+        return scan_dir(str(d), d.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return frozenset()
+
+def thumbnail_path(video_path: Path) -> Path:
+    return video_path.with_suffix(".jpg")
+
+def make_thumbnail(video_path: Path):
+    """Write the first frame of video_path as a small JPEG poster next to it."""
+    thumb = thumbnail_path(video_path)
+    # the poster on disk is the cache: only redo it if the clip is newer
+    if thumb.exists() and thumb.stat().st_mtime_ns >= video_path.stat().st_mtime_ns:
+        return
+    subprocess.run([
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-ss", "0", "-i", str(video_path),
+        "-frames:v", "1", "-vf", "scale=320:-2", "-q:v", "5",
+        str(thumb)
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+@st.cache_resource
+def poster_pool():
+    # posters get their own two workers, so a page of them never queues ahead of a
+    # user's preview or save on ffmpeg_pool
+    return ThreadPoolExecutor(max_workers=2)
+
+@st.cache_resource
+def poster_jobs():
+    # clip path -> poster future while it is queued or running, so a clip is queued once
+    # however often the page reruns
+    return {}
+
+def queue_posters(paths):
+    """Make missing posters in the background without holding up the page."""
+    jobs = poster_jobs()
+    for p in paths:
+        if p not in jobs:
+            job = jobs[p] = poster_pool().submit(make_thumbnail, p)
+            # forget it once it finishes: a poster that still isn't on disk is retried next rerun
+            job.add_done_callback(lambda _, p=p: jobs.pop(p, None))
+
+def save_segment(conn, lock, src: Path, out_path: Path, start: float, end: float, bucket, notes,
+                 accurate: bool = False, on_progress=None):
+    """Cut the segment and record it; runs on the ffmpeg pool."""
+    cut_segment(src, out_path, start, end, accurate, on_progress)
+    make_thumbnail(out_path)
+    duration, fps = read_video_info(str(out_path))  # stored so browse_page never has to probe
+    with lock, conn:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        rec_id = c.execute(UPSERT_REC_SQL, (src.name,)).fetchone()[0]
+        rel_path = str(out_path.relative_to(DATA_DIR))
+        c.execute(INSERT_SEG_SQL, (rec_id, rel_path, start, end, bucket, notes, duration, fps))
+    query_segments.clear()
+
+# --- Media URLs ---
+@st.cache_resource(max_entries=MEDIA_CACHE_ENTRIES, show_spinner=False)
+def read_media(path_str: str, mtime_ns: int, size: int) -> bytes:
+    # mtime/size are only the cache key, as in probe_video. cache_resource hands back the same
+    # immutable bytes on every hit; st.cache_data would unpickle a fresh copy each time
+    with open(path_str, "rb") as f:
+        return f.read()
+
+def media_bytes(path: Path) -> bytes:
+    """path's contents, read from disk once per (path, mtime, size) unless the file is huge."""
+    stat = path.stat()
+    if stat.st_size > MEDIA_CACHE_FILE_MAX:
+        return path.read_bytes()  # read for this rerun only
+    return read_media(str(path), stat.st_mtime_ns, stat.st_size)
+
+def video_url(path: Path) -> str:
+    """URL for a data file on Streamlit's own /media endpoint, for the custom players."""
+    # the same store st.video uses: served from Streamlit's origin with Range support, so
+    # the players work from any browser that can reach the app. Streamlit drops the entry
+    # once a rerun stops asking for it, so call this only for what is actually on screen.
+    mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    url = runtime.get_instance().media_file_mgr.add(media_bytes(path), mimetype, f"golf.{path.as_posix()}")
+    base = st.get_option("server.baseUrlPath").strip("/")
+    return f"/{base}{url}" if base else url
+
+def poster_url(video_path: Path):
+    poster = thumbnail_path(video_path)
+    return video_url(poster) if poster.name in dir_entries(poster.parent) else None
+
+def poster_attrs(poster_src) -> str:
+    # with a poster the tile shows a JPEG and the MP4 is only fetched on play
+    if poster_src:
+        return f'poster="{poster_src}" preload="none"'
+    return 'preload="metadata"'
+
+BUTTON_STYLE = "margin: 2px; padding: 4px 8px; color: white; border: none; border-radius: 4px; cursor: pointer;"
+
+def player_button(label: str, act: str, color: str, rate=None) -> str:
+    rate_attr = f' data-rate="{rate}"' if rate is not None else ""
+    return (f'<button data-act="{act}"{rate_attr} '
+            f'style="{BUTTON_STYLE} background: {color};">{label}</button>')
+
+def build_player_html(video_src: str, video_id: str, enhanced: bool = True,
+                      fps: float = 30.0, poster_src=None) -> str:
+    """A card's video player; enhanced adds frame stepping, a time readout and arrow/space keys."""
+    # the src stays in data-src until player.js sees the card scroll into view
+    video = f"""
+        <video id="{video_id}" width="100%" controls {poster_attrs(poster_src)}
+               data-src="{video_src}" data-frame="{1.0 / fps}" style="background: #000; border-radius: 4px;">
+            Your browser does not support the video tag.
+        </video>"""
+
+    if enhanced:
+        speeds = [(0.1, "#007bff"), (0.25, "#007bff"), (0.5, "#007bff"), (1, "#28a745")]
+        speed_row = "".join(player_button(f"{r}×", "speed", c, r) for r, c in speeds)
+        frame_row = (player_button("◀ Prev", "prev", "#ff6b35")
+                     + player_button("Next ▶", "next", "#ff6b35")
+                     + player_button("Pause", "toggle", "#6c757d"))
+        body = f"""
         <div style="margin-top: 8px; text-align: center;">
-            <strong style="color: white; margin-right: 10px;">Speed:</strong>
-            <button onclick="setSpeed_{video_id}(0.1)" 
-                    style="margin: 2px; padding: 4px 8px; background: #007bff; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                0.1×
-            </button>
-            <button onclick="setSpeed_{video_id}(0.25)" 
-                    style="margin: 2px; padding: 4px 8px; background: #007bff; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                0.25×
-            </button>
-            <button onclick="setSpeed_{video_id}(0.5)" 
-                    style="margin: 2px; padding: 4px 8px; background: #007bff; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                0.5×
-            </button>
-            <button onclick="setSpeed_{video_id}(1)" 
-                    style="margin: 2px; padding: 4px 8px; background: #28a745; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                1×
-            </button>
+            <strong style="color: white; margin-right: 10px;">Speed:</strong>{speed_row}
         </div>
-        
-        <!-- Frame Controls -->
         <div style="margin-top: 8px; text-align: center;">
-            <strong style="color: white; margin-right: 10px;">Frame:</strong>
-            <button 
-                    onclick="previousFrame_{video_id}()"
-                    onmousedown="window._prevInterval_{video_id} = setInterval(previousFrame_{video_id}, 150)"
-                    onmouseup="clearInterval(window._prevInterval_{video_id})"
-                    onmouseleave="clearInterval(window._prevInterval_{video_id})"
-                    style="margin: 2px; padding: 4px 8px; background: #ff6b35; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                ◀ Prev
-            </button>
-            <button onclick="nextFrame_{video_id}()" 
-                    onmousedown="window._nextInterval_{video_id} = setInterval(nextFrame_{video_id}, 150)"
-                    onmouseup="clearInterval(window._nextInterval_{video_id})"
-                    onmouseleave="clearInterval(window._nextInterval_{video_id})"
-                    style="margin: 2px; padding: 4px 8px; background: #ff6b35; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                Next ▶
-            </button>
-            <button onclick="pauseVideo_{video_id}()" 
-                    style="margin: 2px; padding: 4px 8px; background: #6c757d; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                Pause
-            </button>
+            <strong style="color: white; margin-right: 10px;">Frame:</strong>{frame_row}
         </div>
-        
-        <!-- Current Time Display -->
         <div style="margin-top: 8px; text-align: center;">
-            <span id="timeDisplay_{video_id}" style="color: white; font-family: monospace; font-size: 14px;">
-                0.00s
-            </span>
-        </div>
-        <video id="{video_id}" width="100%" controls preload="metadata" 
-               style="background: #000; border-radius: 4px;">
-            <source src="{video_src}" type="video/mp4">
-            Your browser does not support the video tag.
-        </video>
-    </div>
-    
-    <script>
-        (function() {{
-            const video = document.getElementById('{video_id}');
-            const timeDisplay = document.getElementById('timeDisplay_{video_id}');
-            const frameDuration = {frame_duration};
-            
-            // Update time display
-            function updateTimeDisplay() {{
-                if (video && timeDisplay) {{
-                    timeDisplay.textContent = video.currentTime.toFixed(2) + 's';
-                }}
-            }}
-            
-            if (video) {{
-                video.addEventListener('timeupdate', updateTimeDisplay);
-                video.addEventListener('loadedmetadata', updateTimeDisplay);
-            }}
-            
-            // Speed control
-            window.setSpeed_{video_id} = function(rate) {{
-                if (video) {{
-                    video.playbackRate = rate;
-                }}
-            }}
-            
-            // Frame navigation
-            window.previousFrame_{video_id} = function() {{
-                if (video) {{
-                    video.pause();
-                    video.currentTime = Math.max(0, video.currentTime - frameDuration);
-                    updateTimeDisplay();
-                }}
-            }}
-            
-            window.nextFrame_{video_id} = function() {{
-                if (video) {{
-                    video.pause();
-                    video.currentTime = Math.min(video.duration || 0, video.currentTime + frameDuration);
-                    updateTimeDisplay();
-                }}
-            }}
-            
-            window.pauseVideo_{video_id} = function() {{
-                if (video) {{
-                    if (video.paused) {{
-                        video.play();
-                    }} else {{
-                        video.pause();
-                    }}
-                }}
-            }}
-            
-            // Keyboard shortcuts
-            document.addEventListener('keydown', function(e) {{
-                // Only if this video is in focus area
-                const rect = video.getBoundingClientRect();
-                const isInView = rect.top >= 0 && rect.top <= window.innerHeight;
-                
-                if (isInView && video) {{
-                    switch(e.key) {{
-                        case 'ArrowLeft':
-                            e.preventDefault();
-                            window.previousFrame_{video_id}();
-                            break;
-                        case 'ArrowRight':
-                            e.preventDefault();
-                            window.nextFrame_{video_id}();
-                            break;
-                        case ' ':
-                            e.preventDefault();
-                            window.pauseVideo_{video_id}();
-                            break;
-                    }}
-                }}
-            }});
-        }})();
-    </script>
-    """
-    return html
-
-def create_simple_video_player(video_path: Path, video_id: str):
-    """Create a simple video player without localhost server"""
-    file_size = video_path.stat().st_size
-    
-    # For files larger than 50MB, show a warning and use file path
-    if file_size > 50 * 1024 * 1024:
-        st.warning(f"Video file is {file_size // (1024*1024)}MB. Large files may not play properly.")
-        # Try to use file:// URL (works in some browsers)
-        video_src = f"file://{video_path.absolute()}"
+            <span class="time-display" style="color: white; font-family: monospace; font-size: 14px;">0.00s</span>
+        </div>{video}"""
     else:
-        # Use base64 encoding for smaller files
-        video_src = video_to_base64(video_path)
-    
-    html = f"""
-    <div style="background: #000; padding: 8px; border-radius: 8px; margin-bottom: 16px;">
-        <video id="{video_id}" width="100%" controls preload="metadata" 
-               style="background: #000; border-radius: 4px;">
-            <source src="{video_src}" type="video/mp4">
-            Your browser does not support the video tag.
-        </video>
-        <div style="margin-top: 8px; text-align: center;">
-            <button onclick="setSpeed_{video_id}(0.25)" 
-                    style="margin: 2px; padding: 4px 8px; background: #007bff; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                0.25×
-            </button>
-            <button onclick="setSpeed_{video_id}(0.5)" 
-                    style="margin: 2px; padding: 4px 8px; background: #007bff; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                0.5×
-            </button>
-            <button onclick="setSpeed_{video_id}(1)" 
-                    style="margin: 2px; padding: 4px 8px; background: #007bff; color: white; border: none; border-radius: 4px; cursor: pointer;">
-                1×
-            </button>
-        </div>
-    </div>
-    <script>
-        function setSpeed_{video_id}(rate) {{
-            const video = document.getElementById('{video_id}');
-            if (video) {{
-                video.playbackRate = rate;
-            }}
-        }}
-    </script>
-    """
-    return html
+        speed_row = "".join(player_button(f"{r}×", "speed", "#007bff", r) for r in (0.25, 0.5, 1))
+        body = f"""{video}
+        <div style="margin-top: 8px; text-align: center;">{speed_row}</div>"""
+
+    keys = " data-keys" if enhanced else ""
+    return f"""
+    <div class="video-container"{keys} style="background: #000; padding: 8px; border-radius: 8px; margin-bottom: 16px;">{body}
+    </div>"""
+
+@st.cache_resource
+def player_script() -> str:
+    """static/player.js, read from disk once per process."""
+    return (STATIC_DIR / "player.js").read_text(encoding="utf-8")
+
+def player_frame(cards, columns: int = 1) -> str:
+    """One iframe document holding the given player cards side by side, plus the player script."""
+    # inlined rather than linked: the iframe must work from any browser that can reach Streamlit
+    script = f"<script>{player_script()}</script>"
+    return (f'<div style="display: grid; grid-template-columns: repeat({columns}, 1fr); gap: 16px;">'
+            + "".join(cards) + "</div>" + script)
+
+def clip_tile(segment, seg_path: Path, is_playing: bool):
+    """A clip's poster and a Play button that loads it into the page's player."""
+    seg_id, bucket = segment[0], segment[3]
+    thumb = thumbnail_path(seg_path)
+    if thumb.name in dir_entries(thumb.parent):
+        st.image(str(thumb))
+    label = f"Segment {seg_id} - Bucket {bucket}"
+    if is_playing:
+        st.button(f"▶️ {label}", key=f"play{seg_id}", type="primary", disabled=True)
+    elif st.button(f"▶️ {label}", key=f"play{seg_id}"):
+        st.session_state["browse_playing"] = seg_id
+        st.rerun()
 
 # --- Streamlit App ---
 def main():
@@ -317,8 +529,22 @@ def main():
     else:
         browse_page()
 
+def report_pending_saves():
+    """Show the outcome of background segment saves that finished since the last rerun."""
+    still_running = []
+    for out_name, bucket, job, progress in st.session_state.get("pending_saves", []):
+        if not job.done():
+            still_running.append((out_name, bucket, job, progress))
+            st.progress(progress["done"], text=f"⏳ Writing {out_name}…")
+        elif job.exception():
+            st.error(f"Failed to save segment {out_name}: {job.exception()}")
+        else:
+            st.success(f"Saved segment {out_name} in bucket '{bucket}'!")
+    st.session_state["pending_saves"] = still_running
+
 def segment_page():
     st.header("✂️ Segment & Categorize a Recording")
+    report_pending_saves()
 
     # — Upload & select recording —
     uploaded = st.file_uploader("Upload a .mp4 recording", type=["mp4"])
@@ -326,7 +552,10 @@ def segment_page():
         save_path = RECORDINGS_DIR / uploaded.name
         save_path.parent.mkdir(exist_ok=True, parents=True)
         if not save_path.exists():
-            save_path.write_bytes(uploaded.getbuffer())
+            # stream to disk in 1 MiB chunks rather than materializing the whole upload
+            uploaded.seek(0)
+            with open(save_path, "wb", buffering=1 << 20) as f:
+                shutil.copyfileobj(uploaded, f, length=1 << 20)
             st.success(f"Saved recording: {uploaded.name}")
 
     recs = list_recordings()
@@ -335,12 +564,13 @@ def segment_page():
         return
 
     selected = st.selectbox("Select a recording", recs, format_func=lambda p: p.name)
-    duration, fps = get_video_info(selected)
+    stat = selected.stat()  # one stat feeds both the probe cache key and the size readout
+    duration, fps = probe_video(str(selected), stat.st_mtime_ns, stat.st_size)
     frame_delta = 1.0 / fps
 
     # — Show original video & meta —
     st.video(str(selected), width = 500)
-    size_mb = selected.stat().st_size / (1024*1024)
+    size_mb = stat.st_size / (1024*1024)
     st.info(f"Duration: {duration:.2f}s | Size: {size_mb:.1f}MB | FPS: {fps:.1f}")
     start_ts = "00:00:00"
     end_ts = format_timestamp(duration)
@@ -374,6 +604,10 @@ def segment_page():
     else:
         st.markdown(f"**Segment window:** {format_timestamp(start)} → {format_timestamp(end)}")
 
+    accurate = st.checkbox(
+        "Frame-accurate cut (slower, re-encodes)", value=False,
+        help="Off: streams are copied and the clip starts on the keyframe at or before Start."
+    )
 
     # — Preview button & inline player —
     if st.button("▶️ Preview Segment"):
@@ -381,22 +615,21 @@ def segment_page():
         preview_dir.mkdir(exist_ok=True, parents=True)
         start_ms = int(start * 1000)
         end_ms   = int(end   * 1000)
-        preview_name = f"{selected.stem}_{start_ms}_{end_ms}.mp4"
+        preview_name = f"{selected.stem}_{start_ms}_{end_ms}{'_exact' if accurate else ''}.mp4"
         preview_path = preview_dir / preview_name
 
         # only re-create if not already there (fast replay)
         if not preview_path.exists():
-            with st.spinner("Creating preview…"):
-                subprocess.run([
-                    "ffmpeg", "-y",
-                    "-i", str(selected),
-                    "-ss", str(start),        # seek before input
-                    "-t",  f"{end-start:.3f}", # duration of segment
-                    # re-encode for accurate seeking
-                    "-c:v", "libx264", "-preset", "ultrafast", "-crf", "23",
-                    "-c:a", "aac", "-b:a", "128k",
-                    str(preview_path)
-                ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            progress = {"done": 0.0}
+            job = ffmpeg_pool().submit(
+                cut_segment, selected, preview_path, start, end, accurate, lambda f: progress.update(done=f)
+            )
+            bar = st.progress(0.0, text="Creating preview…")
+            while not job.done():
+                bar.progress(progress["done"], text="Creating preview…")
+                time.sleep(0.1)
+            bar.empty()
+            job.result()  # re-raise a failed cut here
         st.video(str(preview_path), width = 200)
 
     # — Bucket & notes & final save —
@@ -404,9 +637,8 @@ def segment_page():
     if st.button("Add bucket"):
         b = new_bucket.strip()
         if b:
-            conn = sqlite3.connect(DB_PATH); c = conn.cursor()
-            c.execute("INSERT OR IGNORE INTO buckets(name) VALUES(?)", (b,))
-            conn.commit(); conn.close()
+            db_write(INSERT_BUCKET_SQL, (b,))
+            query_buckets.clear()
             st.success(f"Added bucket: {b}")
 
     bucket = st.selectbox("Assign bucket", list_buckets())
@@ -423,65 +655,36 @@ def segment_page():
             segment_dir.mkdir(exist_ok=True, parents=True)
             out_name = f"seg_{start_ms}_{end_ms}.mp4"
             out_path = segment_dir / out_name
-            with st.spinner(f"Writing segment…"):
-                subprocess.run([
-                    "ffmpeg", "-y",
-                    "-i", str(selected),
-                    "-ss", str(s),        # seek before input
-                    "-t",  f"{e-s:.3f}", # duration of segment
-                    # re-encode for accurate seeking
-                    "-c:v", "libx264", "-preset", "ultrafast", "-crf", "23",
-                    "-c:a", "aac", "-b:a", "128k",
-                    str(out_path)
-                ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-            # record in DB
-            conn = sqlite3.connect(DB_PATH); c = conn.cursor()
-            c.execute("INSERT OR IGNORE INTO recordings(filename) VALUES(?)", (selected.name,))
-            c.execute("SELECT id FROM recordings WHERE filename=?", (selected.name,))
-            rec_id = c.fetchone()[0]
-            rel_path = str(out_path.relative_to(DATA_DIR))
-            c.execute(
-                "INSERT INTO segments(recording_id,filename,start_sec,end_sec,bucket,notes) VALUES(?,?,?,?,?,?)",
-                (rec_id, rel_path, s, e, bucket, notes)
+            # cut + record in the background so the page stays usable
+            progress = {"done": 0.0}
+            job = ffmpeg_pool().submit(
+                save_segment, get_conn(), db_lock(), selected, out_path, s, e, bucket, notes, accurate,
+                lambda f: progress.update(done=f)
             )
-            conn.commit(); conn.close()
-            st.success(f"Saved segment {out_name} in bucket '{bucket}'!")
+            st.session_state.setdefault("pending_saves", []).append((out_name, bucket, job, progress))
+            st.info(f"Writing segment {out_name} in the background…")
 
 def browse_page():
     st.header("🔍 Browse & Edit Segments")
     
     # Add info about keyboard shortcuts
-    st.info("💡 **Keyboard Shortcuts:** Use ← → arrow keys for frame navigation, Space to pause/play (when video is in view)")
+    st.info("💡 Press ▶️ on a clip to load it into the player. **Keyboard shortcuts** (enhanced player): "
+            "← → step one frame, Space plays/pauses the player under the mouse.")
     
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id, filename, imported_at FROM recordings ORDER BY imported_at DESC")
-    recs = c.fetchall()
-    dates = sorted({datetime.fromisoformat(r[2]).date() for r in recs}) if recs else []
-    selected_date = st.sidebar.selectbox("Filter by date", ["All"] + [d.isoformat() for d in dates])
+    dates = list_import_dates()
+    selected_date = st.sidebar.selectbox("Filter by date", ["All"] + dates)
     bucket_names = list_buckets()
     buckets = st.sidebar.multiselect("Filter by bucket", bucket_names, default=None)
 
-    query = (
-        "SELECT s.id, r.filename, s.filename, s.bucket, s.notes "
-        "FROM segments s JOIN recordings r ON s.recording_id=r.id"
-    )
-    params, conds = [], []
-    if selected_date != "All":
-        conds.append("date(r.imported_at)=?")
-        params.append(selected_date)
-    if buckets:
-        # build a "?,?..." placeholder string matching how many were picked
-        placeholder_str = ",".join("?" for _ in buckets)
-        conds.append(f"s.bucket IN ({placeholder_str})")
-        # extend the params array with the actual bucket *strings*
-        params.extend(buckets)
-    if conds:
-        query += " WHERE " + " AND ".join(conds)
-    c.execute(query, params)
-    segments = c.fetchall()
-    conn.close()
+    page = st.sidebar.number_input("Page", min_value=1, value=1, step=1)
+    limit = (BROWSE_PAGE_SIZE, (page - 1) * BROWSE_PAGE_SIZE)
+
+    # only the current page's rows are fetched, so probing/posters below scale with the page
+    if selected_date == "All":
+        query, params = BROWSE_SEG_SQL, (json.dumps(buckets), *limit)
+    else:
+        query, params = BROWSE_SEG_BY_DATE_SQL, (json.dumps(buckets), selected_date, *limit)
+    segments = query_segments(query, params, get_conn().execute("PRAGMA data_version").fetchone()[0])
 
     if not segments or not buckets:
         st.info("No segments found for selected filters.")
@@ -490,72 +693,115 @@ def browse_page():
     # Enhanced video player option
     use_enhanced_player = st.sidebar.checkbox("Use Enhanced Video Player", value=True, help="Enables frame-by-frame navigation and more speed options")
     use_columns = st.sidebar.checkbox("Show in columns", value=True)
-    
+
+    # frame stepping needs each clip's real fps; it is stored on the row, and rows
+    # saved before that (or by detect.py) are probed concurrently and backfilled.
+    # Clips cut from one recording share its fps, so one clip per recording is probed.
+    seg_paths = [DATA_DIR / row[2] for row in segments]
+    fps_list = [row[6] or 30.0 for row in segments]
+    missing_by_rec = {}
+    for i, row in enumerate(segments):
+        if row[6] is None:
+            missing_by_rec.setdefault(row[1], []).append(i)
+    if use_enhanced_player and missing_by_rec:
+        groups = list(missing_by_rec.values())
+        infos = get_video_infos([seg_paths[group[0]] for group in groups])
+        probed, siblings = [], []
+        for group, info in zip(groups, infos):
+            if info:
+                probed.append((info[0], info[1], segments[group[0]][0]))
+                for i in group:
+                    fps_list[i] = info[1]
+                siblings += [(info[1], segments[i][0]) for i in group[1:]]
+        if probed:
+            conn = get_conn()
+            with db_lock(), conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(SET_SEG_INFO_SQL, probed)
+                conn.executemany(SET_SEG_FPS_SQL, siblings)
+            query_segments.clear()
+
+    # clips without a poster get one made on the poster pool; the card renders without it
+    # and picks it up on a later rerun (existence comes from cached folder listings)
+    queue_posters([
+        p for p in seg_paths
+        if p.name in dir_entries(p.parent) and thumbnail_path(p).name not in dir_entries(p.parent)
+    ])
+    # only the clip being watched is handed to Streamlit's media store; every other card is
+    # a poster tile with a Play button, so a rerun loads one clip however many the page lists
+    seg_ids = [row[0] for row in segments]
+    playing_id = st.session_state.get("browse_playing")
+    playing = seg_ids.index(playing_id) if playing_id in seg_ids else 0
+
+    def playing_frame():
+        return player_frame([build_player_html(
+            video_url(seg_paths[playing]), f"video{seg_ids[playing]}", enhanced=use_enhanced_player,
+            fps=fps_list[playing], poster_src=poster_url(seg_paths[playing])
+        )])
+
     if use_columns:
-        cols = st.columns(2)
-        for idx, (seg_id, rec_file, seg_file, bucket, notes) in enumerate(segments):
-            col = cols[idx % 2]
-            seg_path = DATA_DIR / seg_file
-            
-            with col:
-                st.markdown(f"**Segment {seg_id} - Bucket {bucket}**")
-                
-                file_size = seg_path.stat().st_size
-                
-                if use_enhanced_player:
-                    video_html = create_enhanced_video_player(seg_path, f"video{seg_id}")
-                    st.components.v1.html(video_html, height=500)
-                else:  # < 10MB, use simple player
-                    video_html = create_simple_video_player(seg_path, f"video{seg_id}")
-                    st.components.v1.html(video_html, height=400)
-                
-                # Edit controls
-                with st.expander("Edit Details"):
-                    if st.button("🗑️ Delete segment", key=f"delete{seg_id}"):
-                        # 1) delete the file
+        # one shared player beside a scrolling strip of poster tiles
+        # one height for both, so the strip never runs past the player's frame
+        height = PLAYER_HEIGHT if use_enhanced_player else SIMPLE_PLAYER_HEIGHT
+        player_col, strip_col = st.columns(2)
+        with player_col:
+            st.components.v1.html(playing_frame(), height=height)
+        with strip_col, st.container(height=height):
+            for row_start in range(0, len(segments), 2):
+                for col, idx in zip(st.columns(2), range(row_start, min(row_start + 2, len(segments)))):
+                    with col:
+                        clip_tile(segments[idx], seg_paths[idx], idx == playing)
+
+        for row_start in range(0, len(segments), 2):
+            row = range(row_start, min(row_start + 2, len(segments)))
+            for col, idx in zip(st.columns(2), row):
+                seg_id, rec_file, seg_file, bucket, notes, _, _ = segments[idx]
+                seg_path = seg_paths[idx]
+                with col:
+                    st.markdown(f"**Segment {seg_id} - Bucket {bucket}**")
+                    # Edit controls
+                    with st.expander("Edit Details"):
+                        if st.button("🗑️ Delete segment", key=f"delete{seg_id}"):
+                            # 1) delete the file and its poster
+                            for p in (seg_path, thumbnail_path(seg_path)):
+                                try:
+                                    os.remove(p)
+                                except OSError:
+                                    pass
+
+                            # 2) delete the DB row
+                            db_write(DELETE_SEG_SQL, (seg_id,))
+                            query_segments.clear()
+
+                            st.success(f"Deleted segment {seg_id}")
+                            st.rerun()
+
                         try:
-                            os.remove(seg_path)
-                        except OSError:
-                            pass
-
-                        # 2) delete the DB row
-                        conn = sqlite3.connect(DB_PATH)
-                        c = conn.cursor()
-                        c.execute("DELETE FROM segments WHERE id=?", (seg_id,))
-                        conn.commit()
-                        conn.close()
-
-                        st.success(f"Deleted segment {seg_id}")
-                        st.rerun()
-                    
-                    try:
-                        idx = bucket_names.index(bucket)
-                    except ValueError:
-                        idx = 0
-                    new_bucket = st.selectbox("Bucket", options=bucket_names, index=idx, key=f"bucket{seg_id}")
-                    new_notes = st.text_input("Notes", value=notes or "", key=f"notes{seg_id}")
-                    if st.button("Update", key=f"update{seg_id}"):
-                        conn = sqlite3.connect(DB_PATH)
-                        c = conn.cursor()
-                        c.execute("UPDATE segments SET bucket=?, notes=? WHERE id=?", (new_bucket, new_notes, seg_id))
-                        conn.commit()
-                        conn.close()
-                        st.success("Updated segment.")
-                        st.rerun()
+                            idx = bucket_names.index(bucket)
+                        except ValueError:
+                            idx = 0
+                        new_bucket = st.selectbox("Bucket", options=bucket_names, index=idx, key=f"bucket{seg_id}")
+                        new_notes = st.text_input("Notes", value=notes or "", key=f"notes{seg_id}")
+                        if st.button("Update", key=f"update{seg_id}"):
+                            db_write(UPDATE_SEG_SQL, (new_bucket, new_notes, seg_id))
+                            query_segments.clear()
+                            st.success("Updated segment.")
+                            st.rerun()
     else:
         # Single column layout
-        for seg_id, rec_file, seg_file, bucket, notes in segments:
-            seg_path = DATA_DIR / seg_file
+        for idx, (seg_id, rec_file, seg_file, bucket, notes, _, _) in enumerate(segments):
+            seg_path = seg_paths[idx]
             
             with st.container():
                 st.markdown(f"### Segment {seg_id} - Bucket {bucket}")
                 
-                if use_enhanced_player:
-                    video_html = create_enhanced_video_player(seg_path, f"video{seg_id}")
-                    st.components.v1.html(video_html, height=500)
+                if idx != playing:
+                    clip_tile(segments[idx], seg_path, False)
+                elif use_enhanced_player:
+                    st.components.v1.html(playing_frame(), height=PLAYER_HEIGHT)
                 else:
                     # Use streamlit's video player for single column
-                    st.video(str(seg_path))
+                    st.video(media_bytes(seg_path))
                 
                 # Edit controls
                 col1, col2 = st.columns([3, 1])
@@ -569,24 +815,12 @@ def browse_page():
                     new_bucket = st.selectbox("Bucket", options=bucket_names, index=idx, key=f"bucket{seg_id}")
                 
                 if st.button("Update", key=f"update{seg_id}"):
-                    conn = sqlite3.connect(DB_PATH)
-                    c = conn.cursor()
-                    c.execute("UPDATE segments SET bucket=?, notes=? WHERE id=?", (new_bucket, new_notes, seg_id))
-                    conn.commit()
-                    conn.close()
+                    db_write(UPDATE_SEG_SQL, (new_bucket, new_notes, seg_id))
+                    query_segments.clear()
                     st.success("Updated segment.")
                     st.rerun()
                 
                 st.divider()
 
-def main():
-    st.sidebar.title("📂 Recordings")
-    page = st.sidebar.radio("Navigate", ["Segment", "Browse"])
-    init_db()
-    if page == "Segment":
-        segment_page()
-    else:
-        browse_page()
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
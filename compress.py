@@ -2,25 +2,39 @@
 import argparse
 import subprocess
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # Supported input extensions
 VIDEO_EXTS = {".mp4", ".mov", ".avi", ".mkv", ".flv", ".wmv", ".webm"}
 
-def process_file(input_path: Path, output_path: Path, crf: int, preset: str):
+def process_file(input_path: Path, output_path: Path, crf: int, preset: str, threads: int = 0):
     """Run ffmpeg to convert/compress a single file."""
     output_path.parent.mkdir(parents=True, exist_ok=True)
     cmd = [
-        "ffmpeg", "-y",
+        # quiet: several encodes share the terminal
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
         "-i", str(input_path),
         # video: H.264 + chosen preset/quality
         "-c:v", "libx264", "-preset", preset, "-crf", str(crf),
+        "-threads", str(threads),  # 0 = ffmpeg's own choice
         # audio: AAC 128k
         "-c:a", "aac", "-b:a", "128k",
         str(output_path)
     ]
     subprocess.run(cmd, check=True)
 
+def scan_videos(root: Path, rel: Path = Path()):
+    """Yield paths (relative to root) of video files under root, via os.scandir."""
+    with os.scandir(root / rel) as it:
+        for entry in it:
+            # DirEntry answers is_dir/is_file from the readdir data, no extra stat;
+            # like os.walk, don't descend into symlinked folders
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_videos(root, rel / entry.name)
+            elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in VIDEO_EXTS:
+                yield rel / entry.name
+
 def main():
     p = argparse.ArgumentParser(
         description="Convert videos to MP4/H.264 and compress them in batch"
@@ -48,7 +62,15 @@ def main():
         default="medium",
         help="FFmpeg encoding preset (speed vs. compression tradeoff)",
     )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=max(1, (os.cpu_count() or 1) // 4),
+        help="How many files to encode at once (each gets an equal share of the cores)",
+    )
     args = p.parse_args()
+    if args.jobs < 1:
+        p.error("--jobs must be at least 1")
 
     inp = args.input_dir.resolve()
     out = (args.output_dir or (inp / "_compressed")).resolve()
@@ -56,27 +78,36 @@ def main():
     print(f"Output dir: {out}")
     print(f"CRF        : {args.crf}")
     print(f"Preset     : {args.preset}")
+    print(f"Jobs       : {args.jobs}")
     print()
 
-    for root, _, files in os.walk(inp):
-        root_path = Path(root)
-        rel = root_path.relative_to(inp)
-        for fname in files:
-            in_path = root_path / fname
-            if in_path.suffix.lower() not in VIDEO_EXTS:
-                continue  # skip non-video files
-
-            # always output .mp4
-            out_rel = rel / (in_path.stem + ".mp4")
-            out_path = out / out_rel
-            if out_path.exists():
-                continue
+    # collect the work first, then encode independent files side by side
+    candidates = list(scan_videos(inp))
+    # always output .mp4, so x.mov and x.mp4 would land on the same file; the first one wins
+    by_out = {}
+    for rel in candidates:
+        out_path = out / rel.with_suffix(".mp4")
+        if out_path in by_out:
+            print(f"  ⚠ Skipping {rel}: {by_out[out_path]} already maps to {out_path.relative_to(out)}")
+        else:
+            by_out[out_path] = rel
+    jobs = [
+        (inp / rel, out_path, out_path.relative_to(out))
+        for out_path, rel in by_out.items()
+        if not out_path.exists()
+    ]
 
+    threads = max(1, (os.cpu_count() or 1) // args.jobs)
+    with ThreadPoolExecutor(max_workers=args.jobs) as ex:
+        futures = {}
+        for in_path, out_path, out_rel in jobs:
             print(f"→ {in_path.relative_to(inp)}  →  {out_rel}")
+            futures[ex.submit(process_file, in_path, out_path, args.crf, args.preset, threads)] = in_path
+        for fut in as_completed(futures):
             try:
-                process_file(in_path, out_path, args.crf, args.preset)
+                fut.result()
             except subprocess.CalledProcessError:
-                print(f"  ✖ Error processing {in_path}")
+                print(f"  ✖ Error processing {futures[fut]}")
     print("\nAll done!")
 
 if __name__ == "__main__":
@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
+import argparse
+import functools
 import os
+import re
 import sys
 import cv2
 import numpy as np
 from scipy.signal import find_peaks
 import subprocess
 import sqlite3
+import queue
+import threading
 import shutil
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # ── CONFIG ─────────────────────────────────────────────────────────────
 COMPRESSED_DIR    = Path("compressed")
@@ -16,47 +22,165 @@ SWINGS_DIR        = Path("swings")
 SWINGS_DIR.mkdir(exist_ok=True)
 SEGMENTS_DIR      = Path("data/segments")
 DOWNSAMPLE_FACTOR = 4
+FLOW_SCALE        = 0.5   # frames are shrunk by this before optical flow
 EDGE_TRIM_PCT     = 0.0258
 MIN_SEP_SEC       = 20.0
 WINDOW_SEC        = 10.0
+# swing clips are written by process_one_video as "<stem>_<nn>_<start>s.mp4"
+CLIP_RE           = re.compile(r"^(?P<stem>.+)_\d+_(?P<start>\d+(?:\.\d+)?)s$")
 
 SEGMENTS_DIR      = Path("data/segments")
 DATA_DIR          = Path("data")
 DB_PATH           = DATA_DIR / "metadata.db"
 
 # ── UTILITIES ──────────────────────────────────────────────────────────
+@functools.lru_cache(maxsize=256)
+def probe_duration(path_str: str, mtime_ns: int) -> float:
+    # mtime_ns is only the cache key: a re-encoded file gets measured again
+    # the container header has the real duration; frame_count/fps drifts on variable-rate phone video
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path_str],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(out)
+
 def get_video_duration(path: Path) -> float:
-    cap = cv2.VideoCapture(str(path))
-    fps         = cap.get(cv2.CAP_PROP_FPS)
-    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-    cap.release()
-    return frame_count / fps
-
-def compute_motion_series(video_path: Path, downsample: int):
-    cap, fps = cv2.VideoCapture(str(video_path)), None
+    return probe_duration(str(path), path.stat().st_mtime_ns)
+
+def cuda_available() -> bool:
+    # pip's opencv wheels ship a cv2.cuda module with no devices behind it
+    return hasattr(cv2, "cuda") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+
+def sample_gray_frames(video_path: Path, downsample: int):
+    """Yield (time, scaled grayscale frame) for every `downsample`-th frame."""
+    # let FFmpeg decode on the GPU/VAAPI/etc. where it can; it silently stays in software otherwise
+    cap = cv2.VideoCapture(str(video_path), cv2.CAP_FFMPEG,
+                           [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
     fps = cap.get(cv2.CAP_PROP_FPS)
-    prev_gray = None
     idx = 0
-    times, mags = [], []
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if idx % downsample == 0:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            if prev_gray is not None:
+    try:
+        # grab() only advances the decoder; skipped frames never get converted to BGR.
+        # Seeking past them instead would re-decode from the previous keyframe each time.
+        while cap.grab():
+            if idx % downsample == 0:
+                _, frame = cap.retrieve()
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                # only the mean magnitude is used, so a quarter of the pixels gives the same peaks
+                yield idx/fps, cv2.resize(gray, None, fx=FLOW_SCALE, fy=FLOW_SCALE,
+                                          interpolation=cv2.INTER_AREA)
+            idx += 1
+    finally:
+        cap.release()
+
+def motion_cpu(frames, dis: bool = False):
+    # Farneback by default. DIS (--dis) is several times cheaper on CPU but moved some detected
+    # impacts on the published wedge clips, so it stays opt-in until it has been validated.
+    # flow and mag are written in place from the second pair on rather than reallocated;
+    # DIS gets no flow buffer, since it would take one as an initial guess from the previous pair
+    engine = cv2.DISOpticalFlow_create(cv2.DISOPTICAL_FLOW_PRESET_FAST) if dis else None
+    prev_gray = flow = mag = None
+    for t, gray in frames:
+        if prev_gray is not None:
+            if engine is not None:
+                flow = engine.calc(prev_gray, gray, None)
+            else:
                 flow = cv2.calcOpticalFlowFarneback(
-                    prev_gray, gray, None,
+                    prev_gray, gray, flow,
                     pyr_scale=0.5, levels=3, winsize=15,
                     iterations=3, poly_n=5, poly_sigma=1.2, flags=0
                 )
-                mag, _ = cv2.cartToPolar(flow[...,0], flow[...,1])
-                times.append(idx/fps)
-                mags.append(mag.mean())
-            prev_gray = gray
-        idx += 1
-    cap.release()
-    return np.array(times), np.array(mags)
+            # magnitude only; cartToPolar also computed an angle per pixel that was thrown away
+            mag = cv2.magnitude(flow[...,0], flow[...,1], mag)
+            yield t, mag.mean()
+        prev_gray = gray
+
+def nvof_engine(size):
+    # Turing+ GPUs have a fixed-function optical flow unit; None without it or the contrib build
+    try:
+        return cv2.cuda.NvidiaOpticalFlow_2_0.create(
+            size, perfPreset=cv2.cuda.NvidiaOpticalFlow_2_0_NV_OF_PERF_LEVEL_FAST)
+    except (AttributeError, cv2.error):
+        return None
+
+def motion_gpu(frames):
+    # hardware flow when the GPU has it, else CUDA Farneback with the same levels/window/
+    # iterations/poly settings motion_cpu passes to calcOpticalFlowFarneback;
+    # either way only the mean magnitude leaves the device
+    nvof = farn = None
+    g_prev, g_cur, g_flow = cv2.cuda_GpuMat(), cv2.cuda_GpuMat(), cv2.cuda_GpuMat()
+    g_float = cv2.cuda_GpuMat()
+    have_prev = False
+    for t, gray in frames:
+        if nvof is None and farn is None:
+            nvof = nvof_engine((gray.shape[1], gray.shape[0]))
+            if nvof is None:
+                # numLevels, pyrScale, fastPyramids, winSize, numIters, polyN, polySigma, flags
+                farn = cv2.cuda.FarnebackOpticalFlow.create(3, 0.5, False, 15, 3, 5, 1.2, 0)
+        g_cur.upload(gray)
+        if have_prev:
+            if nvof is not None:
+                # one vector per 4x4 block, fixed-point until converted
+                g_flow, _ = nvof.calc(g_prev, g_cur, g_flow)
+                g_float = nvof.convertToFloat(g_flow, g_float)
+            else:
+                g_float = farn.calc(g_prev, g_cur, g_float)
+            fx, fy = cv2.cuda.split(g_float)
+            w, h = fx.size()
+            yield t, cv2.cuda.sum(cv2.cuda.magnitude(fx, fy))[0] / (w * h)
+        # the frame just uploaded becomes the previous one without a second upload
+        g_prev, g_cur = g_cur, g_prev
+        have_prev = True
+    if nvof is not None:
+        nvof.collectGarbage()
+
+def prefetch(items, depth: int = 4):
+    """Iterate `items` on a background thread, keeping up to `depth` results ready."""
+    q = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+    def put(entry):
+        # timed so the producer notices a consumer that stopped early instead of blocking forever
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    break
+        except Exception as e:
+            put((done, e))
+        else:
+            put((done, None))
+        finally:
+            # releases e.g. sample_gray_frames' VideoCapture when the consumer bailed out
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, err = q.get()
+            if err is not None:
+                raise err
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
+def compute_motion_series(video_path: Path, downsample: int, dis: bool = False):
+    # decode + resize run ahead on their own thread while this one computes flow;
+    # OpenCV drops the GIL in both, so the stages really overlap
+    frames = prefetch(sample_gray_frames(video_path, downsample))
+    series = motion_gpu(frames) if cuda_available() else motion_cpu(frames, dis)
+    # (t, m) pairs go straight into one flat float array; no per-sample Python lists
+    flat = np.fromiter(chain.from_iterable(series), dtype=np.float64)
+    return flat[0::2], flat[1::2]
 
 def detect_impacts(times, mags, percentile=95, min_sep=MIN_SEP_SEC):
     if len(mags) < 2:
@@ -95,7 +219,7 @@ def detect_impacts(times, mags, percentile=95, min_sep=MIN_SEP_SEC):
 
 # ── MAIN ────────────────────────────────────────────────────────────────
 
-def process_one_video(video: Path, all_results):
+def process_one_video(video: Path, dis: bool = False):
     stem = video.stem
     already = list(SWINGS_DIR.glob(f"{stem}_*.mp4"))
     if already:
@@ -105,11 +229,12 @@ def process_one_video(video: Path, all_results):
     dur = get_video_duration(video)
     print(f"   Duration: {dur:.2f}s")
     # 1) detect if not debugging
-    times, mags = compute_motion_series(video, downsample=DOWNSAMPLE_FACTOR)
+    times, mags = compute_motion_series(video, downsample=DOWNSAMPLE_FACTOR, dis=dis)
     impacts = detect_impacts(times, mags)
     # 2) trim edges
     lo, hi = dur * EDGE_TRIM_PCT, dur*(1-EDGE_TRIM_PCT)
-    impacts = impacts[(impacts>=lo)&(impacts<=hi)]
+    # impacts come out of find_peaks in time order, so the kept range is one slice
+    impacts = impacts[np.searchsorted(impacts, lo, "left"):np.searchsorted(impacts, hi, "right")]
     print(f"   Predicted impacts: {impacts.tolist()}")
     # # 4) load manual windows
     # manual = load_manual_windows(stem)
@@ -131,20 +256,18 @@ def process_one_video(video: Path, all_results):
     #     "added":   sorted(added),
     #     "missed":  sorted(missed),
     # }
-    # 6) write out clips
+    # 6) write out clips: one ffmpeg for all of them, each window a separately seeked input
     swing_dir = SWINGS_DIR
+    inputs, outputs = [], []
     for i, t in enumerate(impacts, start=1):
         start_time = max(0, t - WINDOW_SEC)
         out_name   = f"{stem}_{i:02d}_{start_time:.1f}s.mp4"
         out_path   = swing_dir / out_name
-        subprocess.run([
-            "ffmpeg","-y",
-            "-ss", f"{start_time:.3f}",
-            "-i", str(video),
-            "-t",  f"{2*WINDOW_SEC:.3f}",
-            "-c",  "copy",
-            str(out_path)
-        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        inputs  += ["-ss", f"{start_time:.3f}", "-t", f"{2*WINDOW_SEC:.3f}", "-i", str(video)]
+        outputs += ["-map", f"{i-1}:v:0", "-map", f"{i-1}:a:0?", "-c", "copy", str(out_path)]
+    if inputs:
+        subprocess.run(["ffmpeg", "-y", *inputs, *outputs],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     print(f"   Wrote {len(impacts)} swing clips to {swing_dir}/")
     # ── SUMMARY ─────────────────────────────────────────────────────────────
     # print("\n📊 Segmentation Summary:")
@@ -159,17 +282,20 @@ def process_one_video(video: Path, all_results):
     # print(f"  Total correct segments:         {total_correct}")
     # print(f"  Total incorrectly added:        {total_added}")
     # print(f"  Total manually missed segments: {total_missed}")
-def auto_segment_all():
-    all_results = {}  # video_stem → { correct, added, missed }
-
+def auto_segment_all(dis: bool = False):
     videos = list(COMPRESSED_DIR.glob("*.mp4"))
     if not videos:
         print("No videos found in", COMPRESSED_DIR)
         return
 
-    print(f"Starting segmentation using up to {os.cpu_count()} threads...")
-    with ThreadPoolExecutor(max_workers=os.cpu_count()) as exe:
-        futures = { exe.submit(process_one_video, v, all_results): v for v in videos }
+    # one process per video; each gets its own slice of the cores for OpenCV's thread pool
+    cpus = os.cpu_count() or 1   # None when the count can't be determined
+    workers = min(cpus, len(videos))
+    threads = max(1, cpus // workers)
+    print(f"Starting segmentation using {workers} processes × {threads} OpenCV threads...")
+    with ProcessPoolExecutor(max_workers=workers, initializer=cv2.setNumThreads,
+                             initargs=(threads,)) as exe:
+        futures = { exe.submit(process_one_video, v, dis): v for v in videos }
         for fut in as_completed(futures):
             vid = futures[fut]
             try:
@@ -187,9 +313,21 @@ from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
 from PyQt5.QtCore import QUrl, QTimer
 
+INSERT_REC_SQL = "INSERT OR IGNORE INTO recordings(filename) VALUES(?)"
+GET_REC_ID_SQL = "SELECT id FROM recordings WHERE filename=?"
+INSERT_SEG_SQL = ("INSERT OR IGNORE INTO segments(recording_id,filename,start_sec,end_sec,bucket,notes) "
+                  "VALUES(?,?,?,?,?,?)")
+
+def open_db():
+    # WAL lets app.py keep reading while clips are accepted; NORMAL skips the fsync per commit
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
 def init_db():
     DATA_DIR.mkdir(exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_db()
     c = conn.cursor()
     c.execute("""
         CREATE TABLE IF NOT EXISTS recordings (
@@ -217,13 +355,8 @@ def init_db():
         c.execute("INSERT OR IGNORE INTO buckets(name) VALUES(?)", (b,))
     conn.commit(); conn.close()
 
-def list_buckets():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT name FROM buckets ORDER BY name")
-    names = [r[0] for r in c.fetchall()]
-    conn.close()
-    return names
+def list_buckets(conn):
+    return [r[0] for r in conn.execute("SELECT name FROM buckets ORDER BY name")]
 class PreviewWindow(QMainWindow):
     def __init__(self, video_path: Path, start_time: float, duration: float = 30.0):
         super().__init__()
@@ -256,8 +389,10 @@ class ReviewWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("🎾 Swing Review")
-        self.files = sorted(SWINGS_DIR.glob("*.mp4"))
+        self.files = sorted(p for p in SWINGS_DIR.glob("*.mp4") if CLIP_RE.match(p.stem))
         self.idx = 0
+        # one connection for the whole review session instead of one per accepted clip
+        self.conn = open_db()
 
         # central widget
         w = QWidget()
@@ -280,7 +415,7 @@ class ReviewWindow(QMainWindow):
         v.addLayout(row)
 
         self.bucket_cb = QComboBox()
-        self.bucket_cb.addItems(list_buckets())
+        self.bucket_cb.addItems(list_buckets(self.conn))
         row.addWidget(QLabel("Bucket:"))
         row.addWidget(self.bucket_cb)
 
@@ -313,10 +448,11 @@ class ReviewWindow(QMainWindow):
             return
         clip = self.files[self.idx]
         self.current = clip
-        # parse times
-        stem, _, start_s = clip.stem.rsplit("_", 2)
-        start = float(start_s.rstrip("s"))
+        # parse times once; accept_clip and preview_next reuse them
+        m = CLIP_RE.match(clip.stem)
+        stem, start = m["stem"], float(m["start"])
         end   = start + 2*WINDOW_SEC
+        self.window = (stem, start, end)
 
         url = QUrl.fromLocalFile(str(clip.absolute()))
         self.player.setMedia(QMediaContent(url))
@@ -325,6 +461,10 @@ class ReviewWindow(QMainWindow):
         self.label.setText(f"{clip.name}  —  window {start:.1f}s → {end:.1f}s")
         self.bucket_cb.setCurrentIndex(0)
 
+    def closeEvent(self, event):
+        self.conn.close()
+        super().closeEvent(event)
+
     def toggle_play(self):
         if self.player.state() == QMediaPlayer.PlayingState:
             self.player.pause()
@@ -334,9 +474,7 @@ class ReviewWindow(QMainWindow):
     def accept_clip(self):
         # move file and record DB
         clip = self.current
-        stem, _, start_s = clip.stem.rsplit("_", 2)
-        start = float(start_s.rstrip("s"))
-        end   = start + 2*WINDOW_SEC
+        stem, start, end = self.window
         bucket = self.bucket_cb.currentText()
 
         dest_dir = SEGMENTS_DIR / stem
@@ -348,18 +486,13 @@ class ReviewWindow(QMainWindow):
         shutil.move(str(clip), str(dest))
 
         # DB insert
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
         rec_fn = f"{stem}.mp4"
-        c.execute("INSERT OR IGNORE INTO recordings(filename) VALUES(?)", (rec_fn,))
-        c.execute("SELECT id FROM recordings WHERE filename=?", (rec_fn,))
-        rec_id = c.fetchone()[0]
         rel = str(dest.relative_to(DATA_DIR))
-        c.execute(
-            "INSERT OR IGNORE INTO segments(recording_id,filename,start_sec,end_sec,bucket,notes) VALUES(?,?,?,?,?,?)",
-            (rec_id, rel, start, end, bucket, "")
-        )
-        conn.commit(); conn.close()
+        with self.conn:
+            c = self.conn.cursor()
+            c.execute(INSERT_REC_SQL, (rec_fn,))
+            rec_id = c.execute(GET_REC_ID_SQL, (rec_fn,)).fetchone()[0]
+            c.execute(INSERT_SEG_SQL, (rec_id, rel, start, end, bucket, ""))
 
         self.idx += 1
         self.load_current()
@@ -383,11 +516,8 @@ class ReviewWindow(QMainWindow):
         so you can see your finger-signals without altering the clip itself.
         """
         self.toggle_play()
-        clip = self.current
-        stem, _, start_s = clip.stem.rsplit("_", 2)
-        start = float(start_s.rstrip("s"))
         # segment length was 2*WINDOW_SEC, so end_of_segment = start + window
-        end_of_segment = start + 2 * WINDOW_SEC
+        stem, _, end_of_segment = self.window
 
         # original source lives in COMPRESSED_DIR
         orig = COMPRESSED_DIR / f"{stem}.mp4"
@@ -403,9 +533,13 @@ class ReviewWindow(QMainWindow):
         self._preview_win = preview
 
 if __name__ == "__main__":
-    auto_segment_all()
+    parser = argparse.ArgumentParser(description="Cut swing clips from compressed/, then review them.")
+    parser.add_argument("--dis", action="store_true",
+                        help="use DIS optical flow on the CPU path (faster, not yet validated)")
+    args, qt_args = parser.parse_known_args()  # anything else is for Qt
+    auto_segment_all(dis=args.dis)
     init_db()
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
     win = ReviewWindow()
     win.resize(800, 600)
     win.show()
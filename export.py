@@ -1,17 +1,45 @@
 #!/usr/bin/env python3
 import datetime
+import html
+import os
 import sqlite3
 import shutil
+import tempfile
+import zipfile
 from pathlib import Path
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Paths ---
 DATA_DIR    = Path("data")
 DB_PATH     = DATA_DIR / "metadata.db"
 EXPORT_ROOT = Path("export")
 SITE_ROOT   = Path("docs")
+SITE_VIDEOS = SITE_ROOT / "videos"
+CLIP_ROOTS  = (EXPORT_ROOT, SITE_VIDEOS)
 
-INDEX_HTML = """<!DOCTYPE html>
+# same recipe as app.py, with a bigger cache for the one-shot export scans
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",      # don't block app.py / detect.py while exporting
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",     # DISTINCT/ORDER BY temp b-trees stay in RAM
+    "mmap_size=268435456",   # read pages through a 256 MB mapping instead of read()
+    "cache_size=-65536",     # ~64 MB page cache
+    "busy_timeout=5000",
+)
+
+IMPORT_DATES_SQL = "SELECT DISTINCT date(imported_at) FROM recordings ORDER BY date(imported_at)"
+SEGS_BY_DATE_SQL = """
+    SELECT s.filename, s.bucket
+      FROM segments AS s
+      JOIN recordings AS r
+        ON s.recording_id = r.id
+     WHERE date(r.imported_at) = ?
+"""
+ALL_SEGS_SQL     = "SELECT filename, bucket FROM segments"
+
+# index.html is written in three parts: INDEX_HEAD, one line per clip, INDEX_TAIL
+INDEX_HEAD = """<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
@@ -32,119 +60,201 @@ INDEX_HTML = """<!DOCTYPE html>
     <option value="__all__">All</option>
     {options}
   </select>
-  <div class="video-grid">
-    {videos}
+  <div class="video-grid">"""
+
+INDEX_TAIL = """
   </div>
   <script>
     const filter = document.getElementById('bucketFilter');
-    filter.addEventListener('change', () => {{
+    filter.addEventListener('change', () => {
       const sel = filter.value;
-      document.querySelectorAll('.clip').forEach(div => {{
+      document.querySelectorAll('.clip').forEach(div => {
         div.classList.toggle('hidden',
           sel !== '__all__' && div.dataset.bucket !== sel
         );
-      }});
-    }});
+      });
+    });
   </script>
 </body>
 </html>"""
 
+def open_db():
+    # autocommit; the one write transaction below is explicit
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(f"PRAGMA {pragma}")
+    return conn
+
+def ensure_indexes(conn):
+    # same date index app.py creates, in case the DB only ever saw detect.py;
+    # segments by recording carries filename+bucket so the date join never reads the table.
+    # One IMMEDIATE transaction: the write lock is taken up front, not upgraded mid-DDL.
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_rec_date_file ON recordings(date(imported_at), filename)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_seg_rec_file ON segments(recording_id, filename, bucket)")
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name='sqlite_stat1'").fetchone():
+            conn.execute("ANALYZE")
+
+def link_or_copy(src: Path, dest: Path, link: bool = True):
+    # a hardlink shares the bytes instead of copying them; cross-device/FAT targets get a real copy.
+    # Placed under a unique temp name in dest's folder and renamed over dest, so a missing src
+    # leaves the old dest alone and rows running side by side never share a temp file.
+    fd, tmp_name = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".tmp")
+    os.close(fd)
+    tmp = Path(tmp_name)
+    try:
+        linked = False
+        if link:
+            tmp.unlink()  # os.link needs the name free; mkstemp only reserved it
+            try:
+                os.link(src, tmp)
+                linked = True
+            except OSError:
+                if not src.exists():
+                    raise
+        if not linked:
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+def export_name(src: Path) -> str:
+    """File name a segment is exported under: seg_<start>_<end> repeats across recordings,
+    so the recording folder's name goes in front."""
+    return f"{src.parent.name}_{src.name}"
+
+def export_clip(rel_path: str, bucket_name: str):
+    """Place one segment under every clip root; returns (source or None, lines to report)."""
+    src = DATA_DIR / rel_path
+    lines = []
+    try:
+        for root in CLIP_ROOTS:
+            dest = root / bucket_name / export_name(src)
+            # the site gets its own copy: ffmpeg -y re-cuts data/segments in place, which would
+            # rewrite a hardlinked published clip along with it
+            link_or_copy(src, dest, link=root is not SITE_VIDEOS)
+            lines.append(f"Copied {src} → {dest}")
+    except OSError as e:
+        # the link/copy finds out something went wrong; only then is the source itself checked,
+        # so a missing dest folder or a permissions error isn't reported as a missing clip
+        if not src.exists():
+            return None, [f"⚠️  Missing file, skipping: {src}"]
+        return None, [*lines, f"❌  Failed to export {src}: {e}"]
+    return src, lines
+
 def main():
+    parser = argparse.ArgumentParser(description="Export reviewed segments and build the static site.")
+    which = parser.add_mutually_exclusive_group()
+    which.add_argument("--date", type=datetime.date.fromisoformat,
+                       help="export recordings imported on this day (YYYY-MM-DD)")
+    which.add_argument("--all", action="store_true", help="export every date")
+    args = parser.parse_args()
+
     EXPORT_ROOT.mkdir(exist_ok=True)
     SITE_ROOT.mkdir(exist_ok=True)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_db()
+    ensure_indexes(conn)
     c = conn.cursor()
-    # 1) Fetch all distinct import dates
-    c.execute("SELECT DISTINCT date(imported_at) FROM recordings ORDER BY date(imported_at)")
-    dates = [row[0] for row in c.fetchall() if row[0] is not None]
+    # --date/--all skip the date scan and the menu, so the export can run unattended
+    interactive = not (args.all or args.date)
+    if interactive:
+        # 1) Fetch all distinct import dates
+        c.execute(IMPORT_DATES_SQL)
+        dates = [row[0] for row in c.fetchall() if row[0] is not None]
 
-    if not dates:
-        print("No recordings found in the database.")
-        return
+        if not dates:
+            print("No recordings found in the database.")
+            return
+
+        # 2) Print menu
+        print("Select a date to export segments for recordings imported on that day:")
+        print("  0) All dates")
+        for i, d in enumerate(dates, start=1):
+            print(f"  {i}) {d}")
 
-    # 2) Print menu
-    print("Select a date to export segments for recordings imported on that day:")
-    print("  0) All dates")
-    for i, d in enumerate(dates, start=1):
-        print(f"  {i}) {d}")
-
-    # 3) Prompt for choice
-    choice = None
-    while choice is None:
-        sel = input(f"Enter number (0–{len(dates)}): ").strip()
-        if sel.isdigit():
-            idx = int(sel)
-            if 0 <= idx <= len(dates):
-                choice = idx
-        if choice is None:
-            print("❌  Invalid choice, try again.")
+        # 3) Prompt for choice
+        choice = None
+        while choice is None:
+            sel = input(f"Enter number (0–{len(dates)}): ").strip()
+            if sel.isdigit():
+                idx = int(sel)
+                if 0 <= idx <= len(dates):
+                    choice = idx
+            if choice is None:
+                print("❌  Invalid choice, try again.")
 
     # 4) Determine filter_date
-    if choice == 0:
-        filter_date = None
+    if not interactive:
+        filter_date = args.date.isoformat() if args.date else None
+    else:
+        filter_date = dates[choice - 1] if choice else None
+    if filter_date is None:
         print("→ Exporting for all dates")
     else:
-        filter_date = dates[choice - 1]
         print(f"→ Exporting for recordings imported on {filter_date}")
 
     # 5) Pull segments
     if filter_date:
-        query = """
-            SELECT s.filename, s.bucket
-              FROM segments AS s
-              JOIN recordings AS r
-                ON s.recording_id = r.id
-             WHERE date(r.imported_at) = ?
-        """
-        params = (filter_date,)
+        query, params = SEGS_BY_DATE_SQL, (filter_date,)
     else:
-        query = "SELECT filename, bucket FROM segments"
-        params = ()
-    c.execute(query, params)
-    rows = c.fetchall()
-    conn.close()
+        query, params = ALL_SEGS_SQL, ()
+    # 6) Copy into export/<bucket> and also into site/videos/<bucket> while the rows
+    #    stream off the cursor
+    buckets, copies = set(), []
+    # copy fallbacks are disk-bound and release the GIL
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        for rel_path, bucket_name in c.execute(query, params):
+            if bucket_name not in buckets:
+                buckets.add(bucket_name)
+                for root in CLIP_ROOTS:
+                    (root / bucket_name).mkdir(parents=True, exist_ok=True)
+            copies.append((bucket_name, ex.submit(export_clip, rel_path, bucket_name)))
+        conn.close()
+        # report in row order; only what was placed goes into the zip as <bucket>/<export name>
+        # and gets a clip on the page
+        zip_entries, videos_html, placed_buckets = [], [], set()
+        for bucket_name, fut in copies:
+            src, lines = fut.result()
+            print("\n".join(lines))
+            if src is None:
+                continue
+            zip_entries.append((src, f"{bucket_name}/{export_name(src)}"))
+            placed_buckets.add(bucket_name)
+            # names come from the DB; a quote or '<' in one must not break the page
+            b, name = html.escape(bucket_name), html.escape(export_name(src))
+            # point src to "videos/<bucket>/<filename>"
+            videos_html.append(
+                f'\n    <div class="clip" data-bucket="{b}">'
+                f'<video src="videos/{b}/{name}" controls preload="metadata"></video>'
+                f'<div>{b} / {name}</div>'
+                f'</div>'
+            )
 
-    if not rows:
+    if not copies:
         print("No segments found for that date." if filter_date else "No segments at all.")
         return
 
-    # 6) Copy into export/<bucket> and also into site/videos/<bucket>
-    for rel_path, bucket_name in rows:
-        src = DATA_DIR / rel_path
-        if not src.exists():
-            print(f"⚠️  Missing file, skipping: {src}")
-            continue
-
-        for root in (EXPORT_ROOT, SITE_ROOT / 'videos'):
-            dest_dir = root / bucket_name
-            dest_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dest_dir / src.name)
-            print(f"Copied {src} → {root / bucket_name / src.name}")
-
-    # 7) Zip up the export folder
+    # 7) Zip this export's clips straight from data/; walking export/ would also
+    #    pick up whatever earlier exports left there
     zip_date = filter_date or datetime.date.today().isoformat()
     zip_base = f"export_{zip_date}"
-    zip_path = shutil.make_archive(zip_base, "zip", root_dir=str(EXPORT_ROOT))
+    zip_path = os.path.abspath(f"{zip_base}.zip")
+    # MP4s are already compressed; deflating them again only burns CPU
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for src, arcname in zip_entries:
+            zf.write(src, arcname)
     print(f"\n✅ Export complete! Zipped to {zip_path}")
 
     # 8) Generate site/index.html
-    buckets = sorted({b for (_, b) in rows})
-    options_html = "\n    ".join(f'<option value="{b}">{b}</option>' for b in buckets)
-
-    videos_html = []
-    for rel_path, bucket_name in rows:
-        name = Path(rel_path).name
-        # point src to "videos/<bucket>/<filename>"
-        videos_html.append(
-            f'<div class="clip" data-bucket="{bucket_name}">'
-            f'<video src="videos/{bucket_name}/{name}" controls preload="metadata"></video>'
-            f'<div>{bucket_name} / {name}</div>'
-            f'</div>'
-        )
-    with open(SITE_ROOT / "index.html", "w") as f:
-        f.write(INDEX_HTML.format(options=options_html,
-                                  videos="\n    ".join(videos_html)))
+    options_html = "\n    ".join(f'<option value="{b}">{b}</option>'
+                                   for b in map(html.escape, sorted(placed_buckets)))
+    # the clip lines go out as they are; no page-sized string is ever joined in memory
+    with open(SITE_ROOT / "index.html", "w", buffering=1 << 20) as f:
+        f.write(INDEX_HEAD.format(options=options_html))
+        f.writelines(videos_html)
+        f.write(INDEX_TAIL)
     print(f"\n✅ Static site generated in `{SITE_ROOT}/`")
 
     print("\n→ To publish on GitHub Pages:")
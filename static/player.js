@@ -0,0 +1,80 @@
+// Browse-card player controls, inlined once into each player iframe by app.player_frame.
+// One set of delegated listeners per document, however many players it holds:
+// buttons carry data-act, keys go to the last hovered/focused player (or the first one).
+(function() {
+    if (window._playerBound) return;
+    window._playerBound = true;
+
+    const boxOf = el => el && el.closest ? el.closest('.video-container') : null;
+    const step = (video, dir) => {
+        video.pause();
+        const t = video.currentTime + dir * parseFloat(video.dataset.frame);
+        video.currentTime = Math.min(video.duration || 0, Math.max(0, t));
+    };
+    const actions = {
+        speed:  (video, btn) => { video.playbackRate = parseFloat(btn.dataset.rate); },
+        prev:   video => step(video, -1),
+        next:   video => step(video, 1),
+        toggle: video => { if (video.paused) { video.play(); } else { video.pause(); } },
+    };
+
+    document.addEventListener('click', function(e) {
+        const btn = e.target.closest('[data-act]');
+        const box = boxOf(btn);
+        if (box) actions[btn.dataset.act](box.querySelector('video'), btn);
+    });
+
+    // hold Prev/Next to keep stepping
+    let held = null;
+    const release = () => { clearInterval(held); held = null; };
+    document.addEventListener('mousedown', function(e) {
+        const btn = e.target.closest('[data-act="prev"], [data-act="next"]');
+        const box = boxOf(btn);
+        if (!box) return;
+        const video = box.querySelector('video');
+        release();
+        held = setInterval(() => actions[btn.dataset.act](video, btn), 150);
+    });
+    document.addEventListener('mouseup', release);
+    document.addEventListener('mouseout', e => { if (held && e.target.closest('[data-act]')) release(); });
+
+    // media events don't bubble, so catch them on the way down
+    const showTime = function(e) {
+        const box = boxOf(e.target);
+        const display = box && box.querySelector('.time-display');
+        if (display) display.textContent = e.target.currentTime.toFixed(2) + 's';
+    };
+    document.addEventListener('timeupdate', showTime, true);
+    document.addEventListener('loadedmetadata', showTime, true);
+
+    // keys go to the player last hovered or focused, tracked as it happens so a
+    // keypress never has to measure layout to find one
+    let activeBox = null;
+    const track = e => {
+        const box = boxOf(e.target);
+        if (box && box.dataset.keys) activeBox = box;
+    };
+    document.addEventListener('mouseover', track);
+    document.addEventListener('focusin', track);
+
+    const keyActs = {ArrowLeft: 'prev', ArrowRight: 'next', ' ': 'toggle'};
+    document.addEventListener('keydown', function(e) {
+        const act = keyActs[e.key];
+        if (!act) return;
+        const box = activeBox || document.querySelector('.video-container[data-keys]');
+        if (!box) return;
+        e.preventDefault();
+        actions[act](box.querySelector('video'));
+    });
+
+    // players only get their src once they scroll into view, so a long page
+    // doesn't open a connection per clip up front
+    const lazy = new IntersectionObserver(function(entries) {
+        entries.forEach(function(entry) {
+            if (!entry.isIntersecting) return;
+            lazy.unobserve(entry.target);
+            if (!entry.target.getAttribute('src')) entry.target.src = entry.target.dataset.src;
+        });
+    }, {rootMargin: '200px'});
+    document.querySelectorAll('video[data-src]').forEach(v => lazy.observe(v));
+})();